@@ -1,10 +1,87 @@
+import asyncio
+import gzip
 import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import aiohttp
 import requests
 import logging
-from typing import Dict, List, Any
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Dict, Iterator, List, Any
+
+try:
+    import orjson
+
+    def _json_dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj)
+
+    _json_loads = orjson.loads
+except ImportError:
+    import json
+
+    def _json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+
+    _json_loads = json.loads
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
 
 logger = logging.getLogger(__name__)
 
+# Taille au-delà de laquelle le corps de requête est compressé.
+_GZIP_THRESHOLD = 4096
+
+# Clé non-ASCII internée une fois pour les réponses de listes de modèles.
+_MODELS_KEY = sys.intern("modèles")
+
+
+class _TokenBucket:
+    """Limiteur de débit côté client, partagé entre threads et tâches async.
+
+    ``rate`` est exprimé en jetons par seconde ; ``capacity`` borne la
+    rafale initiale.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self) -> float:
+        """Consume a token if available, else return the wait in seconds."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return 0.0
+            return (1.0 - self._tokens) / self.rate
+
+    def acquire(self) -> None:
+        while True:
+            wait = self._take()
+            if wait == 0.0:
+                return
+            time.sleep(wait)
+
+    async def aacquire(self) -> None:
+        while True:
+            wait = self._take()
+            if wait == 0.0:
+                return
+            await asyncio.sleep(wait)
+
 
 class OlympiaAPI:
     """
@@ -21,6 +98,15 @@ class OlympiaAPI:
             will attempt to read from PROXY environment variable.
         base_url (str, optional): The base URL for the Olympia API.
         user_agent (str, optional): The user agent string used for Nubonyxia requests.
+        max_batch (int, optional): Maximum number of texts a single embedding
+            request may carry. Defaults to 2048.
+        models_cache_ttl (float, optional): How long model listings are cached,
+            in seconds. Defaults to 300.
+        warmup (bool, optional): Whether to pre-open a keep-alive connection in a
+            background thread on construction. Defaults to True; pass False to
+            disable the background pre-connect.
+        rpm (float, optional): Client-side rate limit in requests per minute.
+            Defaults to None, which disables rate limiting.
 
     Raises:
         ValueError: If no token is provided and none can be found in environment variables.
@@ -44,7 +130,11 @@ class OlympiaAPI:
         token: str = None, 
         proxy: str = None,
         base_url: str = "https://api.olympia.bhub.cloud",
-        user_agent: str = "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:102.0) Gecko/20100101 Firefox/102.0"
+        user_agent: str = "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:102.0) Gecko/20100101 Firefox/102.0",
+        max_batch: int = 2048,
+        models_cache_ttl: float = 300.0,
+        warmup: bool = True,
+        rpm: float = None,
     ):
         self.token = (
             token or os.getenv("OLYMPIA_API_KEY") or os.getenv("OLYMPIA_API_TOKEN")
@@ -58,54 +148,170 @@ class OlympiaAPI:
         self.base_url = base_url
         self.nubonyxia_proxy = proxy or os.getenv("PROXY")
         self.nubonyxia_user_agent = user_agent
+        self.max_batch = max_batch
+        self.models_cache_ttl = models_cache_ttl
+        # Cache (endpoint, use_proxy) -> (expiration, liste de modèles).
+        self._models_cache = {}
+        # Auto-régulation du débit : mieux vaut attendre localement que
+        # d'apprendre la limite par un 429.
+        self._bucket = (
+            _TokenBucket(rate=rpm / 60.0, capacity=max(1.0, rpm / 60.0))
+            if rpm
+            else None
+        )
 
-    def _get_headers(self) -> Dict[str, str]:
-        return {
+        # Le token ne change pas pour une instance : les en-têtes sont
+        # construits une seule fois.
+        self._headers = {
             "accept": "application/json",
             "Authorization": f"Bearer {self.token}",
             "Content-Type": "application/json",
         }
 
+        # Session persistante : le keep-alive HTTP évite de repayer le
+        # handshake TCP + TLS à chaque appel. Les erreurs transitoires
+        # (429/5xx) sont rejouées sur la même connexion avec backoff
+        # exponentiel, en respectant l'en-tête Retry-After.
+        self._retry = Retry(
+            total=5,
+            backoff_factor=0.5,
+            backoff_jitter=0.5,
+            status_forcelist=(429, 502, 503, 504),
+            allowed_methods=frozenset(["GET", "POST"]),
+            respect_retry_after_header=True,
+            # Une fois les tentatives épuisées, la dernière réponse doit
+            # remonter jusqu'à _map_error plutôt que lever RetryError.
+            raise_on_status=False,
+        )
+        self._session = requests.Session()
+        # Proxies gérés explicitement : inutile de relire l'environnement
+        # (variables *_PROXY, .netrc) à chaque appel.
+        self._session.trust_env = False
+        self._session.headers.update(self._headers)
+        self._session.mount(
+            self.base_url,
+            HTTPAdapter(pool_connections=4, pool_maxsize=20, max_retries=self._retry),
+        )
+        # Session proxy créée à la demande lors du premier appel Nubonyxia.
+        self._proxy_session = None
+
+        # Pré-ouverture d'une connexion en arrière-plan : le premier
+        # vrai appel trouve un socket keep-alive déjà établi.
+        if warmup:
+            threading.Thread(target=self._warmup, daemon=True).start()
+
+    def _warmup(self) -> None:
+        try:
+            self._session.head(self.base_url, timeout=3)
+        except Exception:
+            pass
+
+    def _get_proxy_session(self) -> requests.Session:
+        if self._proxy_session is None:
+            session = requests.Session()
+            session.trust_env = False
+            session.headers.update(
+                {**self._headers, "User-Agent": self.nubonyxia_user_agent}
+            )
+            session.mount(
+                self.base_url, HTTPAdapter(pool_maxsize=20, max_retries=self._retry)
+            )
+            if self.nubonyxia_proxy:
+                session.proxies.update(
+                    {"http": self.nubonyxia_proxy, "https": self.nubonyxia_proxy}
+                )
+            self._proxy_session = session
+        return self._proxy_session
+
+    def close(self) -> None:
+        """Close the underlying HTTP sessions and their pooled connections."""
+        self._session.close()
+        if self._proxy_session is not None:
+            self._proxy_session.close()
+
+    def __enter__(self) -> "OlympiaAPI":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def _get_headers(self) -> Dict[str, str]:
+        return self._headers
+
+    @staticmethod
+    def _encode_body(data: Dict) -> tuple:
+        """Serialize ``data``, gzipping large bodies to spare the uplink."""
+        if data is None:
+            return None, None
+        body = _json_dumps(data)
+        if len(body) > _GZIP_THRESHOLD:
+            # Niveau 1 : la compression coûte peu face au temps de transfert.
+            return gzip.compress(body, compresslevel=1), {"Content-Encoding": "gzip"}
+        return body, None
+
+    def _validate_texts(self, texts: List[str], enforce_cap: bool = True) -> None:
+        """Check ``texts``; ``enforce_cap`` bounds what one request may carry.
+
+        The async path disables the cap on the full list since it splits
+        the input into sub-batches of at most ``batch_size`` texts itself.
+        """
+        if type(texts) is not list or not texts:
+            raise ValueError("Texts must be a non-empty list of strings")
+        n = len(texts)
+        if enforce_cap and n > self.max_batch:
+            raise ValueError(f"Batch of {n} texts exceeds max_batch={self.max_batch}")
+        if not all(type(text) is str for text in texts):
+            raise ValueError("Texts must be a non-empty list of strings")
+
+    def _validate_batched(self, texts: List[str], batch_size: int) -> None:
+        """Validate input that will be split into ``batch_size`` sub-batches."""
+        self._validate_texts(texts, enforce_cap=False)
+        if batch_size > self.max_batch:
+            raise ValueError(
+                f"batch_size of {batch_size} exceeds max_batch={self.max_batch}"
+            )
+
+    @staticmethod
+    def _map_error(response: requests.Response) -> ValueError:
+        """Build the exception for an error response without touching the
+        body more than necessary."""
+        try:
+            response_json = _json_loads(response.content)
+        except ValueError:
+            response_json = None
+
+        error_message = "Unknown error"
+        if response_json and "error" in response_json:
+            if isinstance(response_json["error"], dict):
+                error_message = response_json["error"].get("message", "Unknown error")
+            else:
+                error_message = str(response_json["error"])
+        elif response_json and "message" in response_json:
+            error_message = response_json["message"]
+        elif response.content:
+            # Corps non-JSON : on plafonne ce qu'on décode pour le log.
+            error_message = response.content[:512].decode(errors="replace")
+
+        message = f"API error: {error_message} (Status code: {response.status_code})"
+        logger.error(message)
+        return ValueError(message)
+
     def _make_request(
         self, method: str, endpoint: str, data: Dict = None, use_proxy: bool = False
     ) -> Any:
         url = f"{self.base_url}/{endpoint}"
-        session = requests.Session() if use_proxy else requests
-
-        if use_proxy and self.nubonyxia_proxy:
-            session.get_adapter("https://").proxy_manager_for(
-                f"http://{self.nubonyxia_proxy}"
-            ).proxy_headers["User-Agent"] = self.nubonyxia_user_agent
-            session.proxies.update(
-                {"http": self.nubonyxia_proxy, "https": self.nubonyxia_proxy}
-            )
+        session = self._get_proxy_session() if use_proxy else self._session
 
-        try:
-            response = session.request(
-                method=method, url=url, headers=self._get_headers(), json=data
-            )
-            
-            # Tentative de récupération du message d'erreur JSON
-            try:
-                response_json = response.json()
-            except:
-                response_json = None
-
-            if not response.ok:
-                error_message = "Unknown error"
-                if response_json and "error" in response_json:
-                    if isinstance(response_json["error"], dict):
-                        error_message = response_json["error"].get("message", "Unknown error")
-                    else:
-                        error_message = str(response_json["error"])
-                elif response_json and "message" in response_json:
-                    error_message = response_json["message"]
-                
-                logger.error(f"API error: {error_message} (Status code: {response.status_code})")
-                raise ValueError(f"API error: {error_message} (Status code: {response.status_code})")
-
-            return response_json if response_json else response.json()
+        body, extra_headers = self._encode_body(data)
+
+        if self._bucket is not None:
+            self._bucket.acquire()
 
+        try:
+            if method == "POST":
+                response = session.post(url, data=body, headers=extra_headers)
+            else:
+                response = session.get(url, headers=extra_headers)
         except requests.exceptions.ConnectionError as e:
             logger.error(f"Connection error: {e}")
             raise ConnectionError(f"Failed to connect to {url}: {e}")
@@ -115,12 +321,14 @@ class OlympiaAPI:
         except requests.exceptions.RequestException as e:
             logger.error(f"Request error: {e}")
             raise RuntimeError(f"Request to {url} failed: {e}")
-        except ValueError as e:
-            # Réémission des erreurs ValueError (qui incluent nos erreurs API personnalisées)
-            raise
-        except Exception as e:
-            logger.error(f"Unexpected error: {e}")
-            raise RuntimeError(f"Unexpected error occurred: {e}")
+
+        if response.status_code >= 400:
+            raise self._map_error(response)
+
+        try:
+            return _json_loads(response.content)
+        except ValueError:
+            return None
 
 
     def chat_completion(
@@ -183,6 +391,36 @@ class OlympiaAPI:
             use_proxy=True,
         )
 
+    def chat_completion_batch(
+        self,
+        messages_list: List[List[Dict[str, str]]],
+        max_workers: int = 8,
+        **kwargs,
+    ) -> List[Dict[str, Any]]:
+        """Send several independent chat completions in parallel.
+
+        Requests share the pooled keep-alive session, so up to
+        ``max_workers`` of them are in flight at once instead of each one
+        waiting a full round-trip behind the previous. Results are
+        returned in input order.
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(
+                executor.map(
+                    lambda messages: self.chat_completion(messages, **kwargs),
+                    messages_list,
+                )
+            )
+
+    def completion_batch(
+        self, prompts: List[str], max_workers: int = 8, **kwargs
+    ) -> List[Dict[str, Any]]:
+        """Send several independent completions in parallel, in input order."""
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(
+                executor.map(lambda prompt: self.completion(prompt, **kwargs), prompts)
+            )
+
     def completion(
         self,
         prompt: str,
@@ -245,8 +483,7 @@ class OlympiaAPI:
 
     def embedding(self, texts: List[str]) -> Dict[str, Any]:
         """OpenAI-style embedding endpoint."""
-        if not texts or not all(isinstance(text, str) for text in texts):
-            raise ValueError("Texts must be a non-empty list of strings")
+        self._validate_texts(texts)
         return self._make_request(
             method="POST",
             endpoint="v1/embeddings",
@@ -256,8 +493,7 @@ class OlympiaAPI:
 
     def embedding_nubonyxia(self, texts: List[str]) -> Dict[str, Any]:
         """OpenAI-style embedding endpoint using Nubonyxia proxy."""
-        if not texts or not all(isinstance(text, str) for text in texts):
-            raise ValueError("Texts must be a non-empty list of strings")
+        self._validate_texts(texts)
         return self._make_request(
             method="POST",
             endpoint="v1/embeddings",
@@ -265,34 +501,166 @@ class OlympiaAPI:
             use_proxy=True,
         )
 
+    def iter_embeddings(
+        self, texts: List[str], use_proxy: bool = False
+    ) -> Iterator[Dict[str, Any]]:
+        """Stream the embedding response, yielding one ``data`` entry at a time.
+
+        With ijson installed the response body is decoded incrementally,
+        so peak memory stays around the size of one vector instead of the
+        whole payload; otherwise the full response is parsed eagerly and
+        iterated.
+        """
+        self._validate_texts(texts)
+        url = f"{self.base_url}/v1/embeddings"
+        session = self._get_proxy_session() if use_proxy else self._session
+        body, extra_headers = self._encode_body({"model": self.model, "input": texts})
+
+        if self._bucket is not None:
+            self._bucket.acquire()
+
+        response = session.post(url, data=body, headers=extra_headers, stream=True)
+        try:
+            if response.status_code >= 400:
+                raise self._map_error(response)
+
+            if ijson is not None:
+                # requests laisse response.raw compressé par défaut :
+                # sans ceci ijson recevrait des octets gzip bruts.
+                response.raw.decode_content = True
+                yield from ijson.items(response.raw, "data.item", use_float=True)
+            else:
+                yield from _json_loads(response.content).get("data", [])
+        finally:
+            response.close()
+
+    async def _aembedding(
+        self,
+        texts: List[str],
+        batch_size: int,
+        max_concurrency: int,
+        proxy: str = None,
+    ) -> Dict[str, Any]:
+        url = f"{self.base_url}/v1/embeddings"
+        batches = [
+            texts[i : i + batch_size] for i in range(0, len(texts), batch_size)
+        ]
+        semaphore = asyncio.Semaphore(max_concurrency)
+        headers = dict(self._headers)
+        if proxy:
+            headers["User-Agent"] = self.nubonyxia_user_agent
+
+        async with aiohttp.ClientSession(headers=headers) as session:
+
+            async def post_batch(batch: List[str]) -> Dict[str, Any]:
+                async with semaphore:
+                    if self._bucket is not None:
+                        await self._bucket.aacquire()
+                    async with session.post(
+                        url,
+                        json={"model": self.model, "input": batch},
+                        proxy=proxy,
+                    ) as response:
+                        try:
+                            response_json = await response.json()
+                        except aiohttp.ContentTypeError:
+                            response_json = None
+
+                        if response.status >= 400:
+                            error_message = "Unknown error"
+                            if response_json and "error" in response_json:
+                                if isinstance(response_json["error"], dict):
+                                    error_message = response_json["error"].get(
+                                        "message", "Unknown error"
+                                    )
+                                else:
+                                    error_message = str(response_json["error"])
+                            elif response_json and "message" in response_json:
+                                error_message = response_json["message"]
+                            logger.error(
+                                f"API error: {error_message} (Status code: {response.status})"
+                            )
+                            raise ValueError(
+                                f"API error: {error_message} (Status code: {response.status})"
+                            )
+                        return response_json
+
+            results = await asyncio.gather(*(post_batch(batch) for batch in batches))
+
+        # Reconstruction d'une réponse unique : les embeddings sont
+        # réindexés dans l'ordre des textes d'entrée.
+        data = []
+        for result in results:
+            data.extend(result.get("data", []))
+        for index, item in enumerate(data):
+            if isinstance(item, dict) and "index" in item:
+                item["index"] = index
+        return {"model": self.model, "data": data}
+
+    async def aembedding(
+        self, texts: List[str], batch_size: int = 32, max_concurrency: int = 5
+    ) -> Dict[str, Any]:
+        """Async embedding endpoint: sub-batches are sent concurrently.
+
+        Splits ``texts`` into batches of ``batch_size`` and keeps at most
+        ``max_concurrency`` requests in flight, returning a single response
+        with embeddings in input order.
+        """
+        self._validate_batched(texts, batch_size)
+        return await self._aembedding(texts, batch_size, max_concurrency)
+
+    async def aembedding_nubonyxia(
+        self, texts: List[str], batch_size: int = 32, max_concurrency: int = 5
+    ) -> Dict[str, Any]:
+        """Async embedding endpoint using Nubonyxia proxy."""
+        self._validate_batched(texts, batch_size)
+        proxy = None
+        if self.nubonyxia_proxy:
+            proxy = (
+                self.nubonyxia_proxy
+                if "://" in self.nubonyxia_proxy
+                else f"http://{self.nubonyxia_proxy}"
+            )
+        return await self._aembedding(texts, batch_size, max_concurrency, proxy=proxy)
+
+    def embedding_batch(
+        self, texts: List[str], batch_size: int = 32, max_concurrency: int = 5
+    ) -> Dict[str, Any]:
+        """Sync wrapper around :meth:`aembedding`."""
+        return asyncio.run(self.aembedding(texts, batch_size, max_concurrency))
+
+    def embedding_batch_nubonyxia(
+        self, texts: List[str], batch_size: int = 32, max_concurrency: int = 5
+    ) -> Dict[str, Any]:
+        """Sync wrapper around :meth:`aembedding_nubonyxia`."""
+        return asyncio.run(
+            self.aembedding_nubonyxia(texts, batch_size, max_concurrency)
+        )
+
+    def _get_models(self, endpoint: str, use_proxy: bool) -> List[str]:
+        key = (endpoint, use_proxy)
+        cached = self._models_cache.get(key)
+        now = time.monotonic()
+        if cached is not None and cached[0] > now:
+            return cached[1]
+        models = self._make_request(
+            method="GET", endpoint=endpoint, use_proxy=use_proxy
+        )[_MODELS_KEY]
+        self._models_cache[key] = (now + self.models_cache_ttl, models)
+        return models
+
     def get_llm_models(self) -> List[str]:
-        """Get available LLM models."""
-        return self._make_request(
-            method="GET", 
-            endpoint="modeles",
-            use_proxy=False
-        )["modèles"]
+        """Get available LLM models (cached for ``models_cache_ttl`` seconds)."""
+        return self._get_models("modeles", use_proxy=False)
 
     def get_llm_models_nubonyxia(self) -> List[str]:
         """Get available LLM models using Nubonyxia proxy."""
-        return self._make_request(
-            method="GET", 
-            endpoint="modeles",
-            use_proxy=True
-        )["modèles"]
+        return self._get_models("modeles", use_proxy=True)
 
     def get_embedding_models(self) -> List[str]:
-        """Get available embedding models."""
-        return self._make_request(
-            method="GET", 
-            endpoint="embeddings",
-            use_proxy=False
-        )["modèles"]
+        """Get available embedding models (cached for ``models_cache_ttl`` seconds)."""
+        return self._get_models("embeddings", use_proxy=False)
 
     def get_embedding_models_nubonyxia(self) -> List[str]:
         """Get available embedding models using Nubonyxia proxy."""
-        return self._make_request(
-            method="GET", 
-            endpoint="embeddings",
-            use_proxy=True
-        )["modèles"]
+        return self._get_models("embeddings", use_proxy=True)
@@ -22,5 +22,7 @@ setup(
     install_requires=[
         "requests",
         "python-dotenv",
+        "aiohttp",
+        "urllib3>=2",
     ],
 )
@@ -1,14 +1,23 @@
+import asyncio
+import gzip
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
 import pytest
+import requests
 import responses
+from aiohttp import web
 from dotenv import load_dotenv
 from olympiabhub import OlympiaAPI
+from olympiabhub.api import _TokenBucket
 
 
 @pytest.fixture
 def api():
     load_dotenv()
     model_name = "test_model"
-    return OlympiaAPI(model=model_name)
+    return OlympiaAPI(model=model_name, warmup=False)
 
 
 @pytest.mark.parametrize(
@@ -52,6 +61,35 @@ def test_api_methods(api, method):
     assert result == expected_response
 
 
+@pytest.mark.parametrize(
+    "method",
+    [
+        ("chat_completion_batch", "v1/chat/completions"),
+        ("completion_batch", "v1/completions"),
+    ]
+)
+@responses.activate
+def test_batch_methods(api, method):
+    method_name, endpoint = method
+
+    if method_name == "chat_completion_batch":
+        data = [[{"role": "user", "content": f"message {i}"}] for i in range(3)]
+    else:
+        data = [f"prompt {i}" for i in range(3)]
+
+    expected_response = {"response": "test_response"}
+
+    responses.add(
+        responses.POST,
+        f"https://api.olympia.bhub.cloud/{endpoint}",
+        json=expected_response,
+        status=200,
+    )
+
+    result = getattr(api, method_name)(data)
+    assert result == [expected_response] * 3
+
+
 @pytest.mark.parametrize(
     "method",
     [
@@ -111,6 +149,261 @@ def test_get_models(api, method):
     assert result == expected_response["modèles"]
 
 
+def test_token_bucket_limits_burst():
+    bucket = _TokenBucket(rate=1000.0, capacity=2.0)
+
+    assert bucket._take() == 0.0
+    assert bucket._take() == 0.0
+    assert bucket._take() > 0.0
+
+
+@responses.activate
+def test_rate_limited_api_calls():
+    load_dotenv()
+    api = OlympiaAPI(model="test_model", warmup=False, rpm=60000)
+
+    responses.add(
+        responses.POST,
+        "https://api.olympia.bhub.cloud/v1/completions",
+        json={"response": "test_response"},
+        status=200,
+    )
+
+    for i in range(3):
+        assert api.completion(f"prompt {i}") == {"response": "test_response"}
+
+
+@responses.activate
+def test_session_reused_across_calls(api, monkeypatch):
+    sessions_used = []
+    original_request = requests.Session.request
+
+    def recording_request(self, *args, **kwargs):
+        sessions_used.append(self)
+        return original_request(self, *args, **kwargs)
+
+    monkeypatch.setattr(requests.Session, "request", recording_request)
+
+    responses.add(
+        responses.POST,
+        "https://api.olympia.bhub.cloud/v1/completions",
+        json={"response": "test_response"},
+        status=200,
+    )
+
+    for i in range(3):
+        api.completion(f"prompt {i}")
+
+    assert len(sessions_used) == 3
+    assert all(session is api._session for session in sessions_used)
+
+
+@responses.activate
+def test_proxy_session_lazy_and_reused(api):
+    assert api._proxy_session is None
+
+    responses.add(
+        responses.POST,
+        "https://api.olympia.bhub.cloud/v1/completions",
+        json={"response": "test_response"},
+        status=200,
+    )
+
+    api.completion_nubonyxia("prompt 1")
+    proxy_session = api._proxy_session
+    assert proxy_session is not None
+    assert proxy_session is not api._session
+
+    api.completion_nubonyxia("prompt 2")
+    assert api._proxy_session is proxy_session
+
+
+async def _serve_embeddings(api, handler, coro):
+    """Run ``coro`` against a local aiohttp server handling /v1/embeddings."""
+    app = web.Application()
+    app.router.add_post("/v1/embeddings", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    api.base_url = f"http://127.0.0.1:{port}"
+    try:
+        return await coro()
+    finally:
+        await runner.cleanup()
+
+
+def test_aembedding_merges_sub_batches(api):
+    texts = [f"text {i}" for i in range(5)]
+    # max_batch ne borne que la taille d'une requête : une liste plus
+    # longue doit passer puisqu'elle est redécoupée en sous-lots.
+    api.max_batch = 3
+    received_batches = []
+
+    async def handler(request):
+        payload = await request.json()
+        received_batches.append(payload["input"])
+        data = [
+            {"index": i, "embedding": [0.5]} for i in range(len(payload["input"]))
+        ]
+        return web.json_response({"model": payload["model"], "data": data})
+
+    async def run():
+        return await api.aembedding(texts, batch_size=2, max_concurrency=2)
+
+    result = asyncio.run(_serve_embeddings(api, handler, run))
+
+    assert result["model"] == "test_model"
+    assert sorted(len(batch) for batch in received_batches) == [1, 2, 2]
+    assert len(result["data"]) == len(texts)
+    assert [item["index"] for item in result["data"]] == list(range(len(texts)))
+
+
+def test_aembedding_rejects_batch_size_over_cap(api):
+    api.max_batch = 3
+
+    with pytest.raises(ValueError, match="max_batch"):
+        asyncio.run(api.aembedding(["test text"], batch_size=4))
+
+
+def test_aembedding_failure(api):
+    async def handler(request):
+        return web.json_response({"error": {"message": "test_error"}}, status=400)
+
+    async def run():
+        return await api.aembedding(["test text"])
+
+    with pytest.raises(ValueError, match="test_error"):
+        asyncio.run(_serve_embeddings(api, handler, run))
+
+
+@responses.activate
+def test_iter_embeddings(api):
+    expected_data = [
+        {"index": 0, "embedding": [0.1, 0.2]},
+        {"index": 1, "embedding": [0.3, 0.4]},
+    ]
+
+    responses.add(
+        responses.POST,
+        "https://api.olympia.bhub.cloud/v1/embeddings",
+        json={"model": "test_model", "data": expected_data},
+        status=200,
+    )
+
+    result = list(api.iter_embeddings(["test text1", "test text2"]))
+    assert result == expected_data
+
+
+def test_iter_embeddings_gzipped_response(api):
+    # Un vrai serveur local : les mocks de responses décompressent de
+    # façon transparente et masqueraient une régression sur response.raw.
+    expected_data = [
+        {"index": 0, "embedding": [0.1, 0.2]},
+        {"index": 1, "embedding": [0.3, 0.4]},
+    ]
+    body = gzip.compress(
+        json.dumps({"model": "test_model", "data": expected_data}).encode("utf-8")
+    )
+
+    class GzipHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), GzipHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    api.base_url = f"http://127.0.0.1:{server.server_port}"
+    try:
+        result = list(api.iter_embeddings(["test text1", "test text2"]))
+    finally:
+        server.shutdown()
+
+    assert result == expected_data
+
+
+def _make_echo_handler(received):
+    """Handler local qui capture l'encodage et le corps de la requête."""
+
+    class EchoHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            received["encoding"] = self.headers.get("Content-Encoding")
+            received["body"] = self.rfile.read(
+                int(self.headers.get("Content-Length", 0))
+            )
+            body = json.dumps({"response": "test_response"}).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return EchoHandler
+
+
+def test_embedding_body_gzipped_over_threshold(api):
+    received = {}
+    server = HTTPServer(("127.0.0.1", 0), _make_echo_handler(received))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    api.base_url = f"http://127.0.0.1:{server.server_port}"
+
+    texts = ["chunk " * 200] * 10  # > 4 Ko une fois sérialisé
+    try:
+        result = api.embedding(texts)
+    finally:
+        server.shutdown()
+
+    assert result == {"response": "test_response"}
+    assert received["encoding"] == "gzip"
+    decompressed = json.loads(gzip.decompress(received["body"]))
+    assert decompressed == {"model": "test_model", "input": texts}
+
+
+def test_embedding_body_not_gzipped_under_threshold(api):
+    received = {}
+    server = HTTPServer(("127.0.0.1", 0), _make_echo_handler(received))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    api.base_url = f"http://127.0.0.1:{server.server_port}"
+
+    texts = ["test text"]
+    try:
+        result = api.embedding(texts)
+    finally:
+        server.shutdown()
+
+    assert result == {"response": "test_response"}
+    assert received["encoding"] is None
+    assert json.loads(received["body"]) == {"model": "test_model", "input": texts}
+
+
+@responses.activate
+def test_get_models_cached(api):
+    expected_response = {"modèles": ["model1", "model2"]}
+
+    responses.add(
+        responses.GET,
+        "https://api.olympia.bhub.cloud/modeles",
+        json=expected_response,
+        status=200,
+    )
+
+    assert api.get_llm_models() == expected_response["modèles"]
+    assert api.get_llm_models() == expected_response["modèles"]
+    assert len(responses.calls) == 1
+
+
 @pytest.mark.parametrize(
     "method",
     [